@@ -1,11 +1,163 @@
 #!/usr/bin/env python3
 import os
+import json
+import functools
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import OrderedDict
 import click
 import librosa
 import soundfile as sf
 import numpy as np
+import scipy.fft
 from scipy import signal
-from pydub import AudioSegment
+import numba
+from numba import njit, prange
+from librosa import stft, istft, phase_vocoder
+
+# Prefer pyFFTW as the scipy.fft backend when it is installed; librosa's
+# STFT (scipy.fft by default since librosa 0.11) and the streaming phase
+# vocoder both go through scipy.fft
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+else:
+    pyfftw.interfaces.cache.enable()
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+
+
+# Phase vocoder analysis settings (librosa defaults)
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# FFT threads for the phase vocoder's STFT/iSTFT (narrowed per batch worker)
+_FFT_WORKERS = os.cpu_count() or 1
+
+# Streaming block size, in hops (256 * 512 = 131072 samples per block)
+STREAM_BLOCK_LENGTH = 256
+STREAM_BLOCK_SIZE = STREAM_BLOCK_LENGTH * HOP_LENGTH
+
+# Stereo effect channel gains
+_STEREO_LEFT_GAIN = 0.95
+_STEREO_RIGHT_GAIN = 0.85
+
+# Right-channel coloration filter for the stereo effect (input-independent),
+# with the right channel gain folded into its numerator
+_STEREO_RIGHT_SOS = signal.iirfilter(
+    2, 0.5, btype='lowpass', ftype='butter', output='sos'
+).astype(np.float32)
+_STEREO_RIGHT_SOS[0, :3] *= _STEREO_RIGHT_GAIN
+
+# Small LRU cache of preallocated STFT matrices, keyed by shape and dtype,
+# capped by total size so it never pins signal-sized memory after a call returns
+_STFT_CACHE = OrderedDict()
+_STFT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _stft_buffer(n_fft, n_frames, dtype, leading_shape=()):
+    """Return a reusable complex STFT matrix of shape leading_shape + (1 + n_fft // 2, n_frames)."""
+    shape = tuple(leading_shape) + (1 + n_fft // 2, n_frames)
+    key = (shape, np.dtype(dtype))
+    buf = _STFT_CACHE.get(key)
+    if buf is not None:
+        _STFT_CACHE.move_to_end(key)
+        return buf
+    
+    buf = np.empty(shape, dtype=dtype, order='F')
+    if buf.nbytes <= _STFT_CACHE_BYTES:
+        # Evict least recently used matrices until the new one fits
+        _STFT_CACHE[key] = buf
+        while sum(b.nbytes for b in _STFT_CACHE.values()) > _STFT_CACHE_BYTES:
+            _STFT_CACHE.popitem(last=False)
+    return buf
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _scale_inplace(buf, scale):
+    """Multiply buf by scale in place."""
+    for i in prange(buf.shape[0]):
+        buf[i] *= scale
+
+
+@njit(cache=True, fastmath=True)
+def _sosfilt_df2t(sos, x, zi, out):
+    """
+    Filter x into out through a cascade of direct-form II transposed biquads.
+    
+    All sections are advanced inside the per-sample loop so each section's
+    two state values stay hot; zi (n_sections, 2) is updated in place.
+    out may be x itself, since each sample is read before it is written.
+    Returns max(|out|), tracked in the same loop for peak normalization.
+    """
+    n_sections = sos.shape[0]
+    peak = 0.0
+    for i in range(x.shape[0]):
+        v = np.float64(x[i])
+        for s in range(n_sections):
+            y = sos[s, 0] * v + zi[s, 0]
+            zi[s, 0] = sos[s, 1] * v - sos[s, 4] * y + zi[s, 1]
+            zi[s, 1] = sos[s, 2] * v - sos[s, 5] * y
+            v = y
+        out[i] = v
+        peak = max(peak, abs(v))
+    return peak
+
+
+def _sosfilt(sos, x, zi=None, out=None):
+    """
+    Apply an SOS filter along the last axis with the compiled cascade,
+    starting from rest unless zi is given.
+    
+    zi has shape x.shape[:-1] + (n_sections, 2) and is updated in place.
+    
+    Returns:
+        tuple of (filtered samples, max(|filtered|))
+    """
+    if zi is None:
+        zi = np.zeros(x.shape[:-1] + (sos.shape[0], 2), dtype=np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    
+    # The compiled kernel is 1-D: run it over each channel row with that
+    # row's state (a single pass over x itself when x is 1-D)
+    peak = 0.0
+    for index in np.ndindex(x.shape[:-1]):
+        peak = max(peak, _sosfilt_df2t(sos, x[index], zi[index], out[index]))
+    return out, peak
+
+
+def _warmup_kernels():
+    """Compile the float32 kernel specializations up front (cached on disk after the first run)."""
+    buf = np.zeros(1, dtype=np.float32)
+    _scale_inplace(buf, np.float32(1.0))
+    _sosfilt(np.zeros((1, 6), dtype=np.float32), buf)
+    # Strided channel column of an (n, 2) stereo buffer
+    pair = np.zeros((1, 2), dtype=np.float32)
+    _sosfilt(_STEREO_RIGHT_SOS, pair[:, 1], out=pair[:, 1])
+
+
+_warmup_kernels()
+
+
+@functools.lru_cache(maxsize=8)
+def _design_guitar_shelf(sr, center=500.0, q=0.7, gain_db=3.0, n_sections=2):
+    """
+    Design the guitar-range peaking EQ as an SOS matrix for a sample rate.
+    
+    Each section is a bilinear-transformed analog peaking biquad (the RBJ
+    cookbook form) carrying an equal share of gain_db, so the cascade
+    boosts the broad band around center by gain_db in total.
+    """
+    A = 10 ** (gain_db / (40 * n_sections))
+    w0 = 2 * np.pi * center / sr
+    alpha = np.sin(w0) / (2 * q)
+    b = np.array([1 + alpha * A, -2 * np.cos(w0), 1 - alpha * A])
+    a = np.array([1 + alpha / A, -2 * np.cos(w0), 1 - alpha / A])
+    section = np.concatenate([b, a]) / a[0]
+    return np.tile(section, (n_sections, 1)).astype(np.float32)
 
 
 def change_speed_preserve_pitch(audio_data, sr, speed_factor):
@@ -13,46 +165,58 @@ def change_speed_preserve_pitch(audio_data, sr, speed_factor):
     Change playback speed while preserving pitch using librosa's phase vocoder.
     
     Args:
-        audio_data: numpy array of audio samples
+        audio_data: numpy array of audio samples, time on the last axis
+                    (multichannel input is (..., n_samples))
         sr: sample rate
         speed_factor: float, e.g., 0.75 for 75% speed, 1.5 for 150% speed
     
     Returns:
         numpy array of time-stretched audio
     """
-    stretched = librosa.effects.time_stretch(audio_data, rate=speed_factor)
+    # Identity stretch: skip the STFT/iSTFT round-trip entirely
+    if speed_factor == 1.0:
+        return audio_data
+    
+    n_samples = audio_data.shape[-1]
+    n_frames = 1 + n_samples // HOP_LENGTH
+    D = _stft_buffer(N_FFT, n_frames, librosa.util.dtype_r2c(audio_data.dtype),
+                     leading_shape=audio_data.shape[:-1])
+    
+    with scipy.fft.set_workers(_FFT_WORKERS):
+        stft(audio_data, n_fft=N_FFT, hop_length=HOP_LENGTH, out=D)
+        
+        # Stretch by phase vocoding, then invert to the predicted length
+        D_stretched = phase_vocoder(D, rate=speed_factor, hop_length=HOP_LENGTH, n_fft=N_FFT)
+        stretched_length = int(round(n_samples / speed_factor))
+        stretched = istft(D_stretched, hop_length=HOP_LENGTH, n_fft=N_FFT,
+                          dtype=audio_data.dtype, length=stretched_length)
     return stretched
 
 
-def enhance_guitar_frequencies(audio_data, sr):
+def enhance_guitar_frequencies(audio_data, sr, out=None):
     """
-    Enhance guitar frequency range (70 Hz - 5 kHz) using parametric EQ.
-    Covers low E string (~82 Hz) with minimal bass rumble.
+    Enhance guitar frequency range using a +3 dB parametric peaking EQ
+    centered at 500 Hz (Q 0.7), leaving bass rumble and treble hiss flat.
     
     Args:
-        audio_data: numpy array of audio samples
+        audio_data: numpy array of audio samples, filtered along the last axis
         sr: sample rate
+        out: optional array to write into; may be audio_data itself to
+             filter in place without allocating
     
     Returns:
         numpy array with enhanced guitar frequencies
     """
-    nyquist = sr / 2
-    
-    # Design bandpass filter for guitar range (70 Hz - 5 kHz)
-    low_freq = 70 / nyquist
-    high_freq = 5000 / nyquist
+    # Boost the guitar range in one filter pass (designed once per sample
+    # rate); the peak comes out of the same pass
+    sos = _design_guitar_shelf(sr)
+    enhanced, max_val = _sosfilt(sos, audio_data, out=out)
     
-    # Create a gentle boost using a bandpass filter
-    sos = signal.butter(4, [low_freq, high_freq], btype='band', output='sos')
-    filtered = signal.sosfilt(sos, audio_data)
-    
-    # Mix original with filtered to boost guitar range by ~3dB
-    enhanced = audio_data + filtered * 0.4
-    
-    # Normalize to prevent clipping
-    max_val = np.max(np.abs(enhanced))
+    # Normalize to prevent clipping, by the peak across all channels
     if max_val > 1.0:
-        enhanced = enhanced / max_val
+        scale = enhanced.dtype.type(1.0 / max_val)
+        for index in np.ndindex(enhanced.shape[:-1]):
+            _scale_inplace(enhanced[index], scale)
     
     return enhanced
 
@@ -66,113 +230,624 @@ def mono_to_stereo_effect(audio_data, sr):
         sr: sample rate
     
     Returns:
-        numpy array with shape (2, n_samples) for stereo output
+        numpy array with shape (n_samples, 2) for stereo output, the
+        channels-last layout soundfile and ffmpeg take without a transpose
     """
-    if len(audio_data.shape) > 1 and audio_data.shape[0] == 2:
+    if len(audio_data.shape) > 1 and audio_data.shape[1] == 2:
         return audio_data
     
-    # Create slight delay for right channel (Haas effect)
-    delay_samples = int(0.015 * sr)  # 15ms delay
+    n_samples = len(audio_data)
+    stereo = np.empty((n_samples, 2), dtype=np.float32)
     
-    left_channel = audio_data
-    right_channel = np.concatenate([np.zeros(delay_samples), audio_data[:-delay_samples]])
+    # Create slight delay for right channel (Haas effect), shifted in place
+    delay_samples = min(int(0.015 * sr), n_samples)  # 15ms delay
+    right_channel = stereo[:, 1]
+    right_channel[:delay_samples] = 0.0
+    right_channel[delay_samples:] = audio_data[:n_samples - delay_samples]
     
-    # Apply slight phase shift to right channel using all-pass filter
-    b, a = signal.iirfilter(2, 0.5, btype='lowpass', ftype='butter', output='ba')
-    right_channel = signal.filtfilt(b, a, right_channel)
+    return _finish_stereo(audio_data, stereo)
+
+
+def _finish_stereo(audio_data, stereo, zi=None):
+    """Filter the delayed right channel held in stereo[:, 1] and apply both channel gains in place."""
+    # Apply slight phase shift to right channel (single forward pass;
+    # the pseudo-stereo effect does not need zero-phase filtering). The
+    # filter also applies the right channel gain, so this one pass writes
+    # the finished right channel back in place.
+    _sosfilt(_STEREO_RIGHT_SOS, stereo[:, 1], zi, out=stereo[:, 1])
     
-    # Reduce intensity slightly to create width
-    left_channel = left_channel * 0.95
-    right_channel = right_channel * 0.85
+    # Reduce intensity slightly to create width, writing straight into the output
+    np.multiply(audio_data, _STEREO_LEFT_GAIN, out=stereo[:, 0], casting='same_kind')
     
-    stereo = np.vstack([left_channel, right_channel])
     return stereo
 
 
-@click.command()
-@click.argument('input_file', type=click.Path(exists=True))
-@click.option('--speed', '-s', default=1.0, help='Playback speed factor (e.g., 0.75 for 75% speed)', type=float)
-@click.option('--enhance-guitar', '-g', is_flag=True, help='Enhance guitar frequency range (80 Hz - 5 kHz)')
-@click.option('--stereo', '-st', is_flag=True, help='Convert mono to pseudo-stereo')
-@click.option('--output', '-o', default=None, help='Output file path (default: input_slowed.mp3)', type=click.Path())
-@click.option('--format', '-f', default='mp3', type=click.Choice(['mp3', 'wav', 'ogg'], case_sensitive=False), help='Output format')
-def slowmedown(input_file, speed, enhance_guitar, stereo, output, format):
+def _open_blocks(input_file):
     """
-    Slow down MP3/audio files for guitar practice while preserving pitch.
+    Open an audio file for block-wise decoding as mono float32.
     
-    Example: python slowmedown.py song.mp3 --speed 0.75 --enhance-guitar --stereo
+    Formats libsndfile supports (WAV/FLAC/OGG/MP3) are read directly with
+    soundfile; anything else is decoded by ffmpeg piping raw float32 PCM.
+    
+    Returns:
+        tuple: (sample_rate, n_samples, iterator of 1-D float32 blocks)
     """
-    # Validate speed factor
-    if speed <= 0:
-        raise click.BadParameter("Speed factor must be greater than 0", param_hint="--speed")
+    try:
+        sfo = sf.SoundFile(input_file)
+    except sf.LibsndfileError:
+        sr, duration = _ffprobe_audio(input_file)
+        return sr, int(duration * sr), _ffmpeg_blocks(input_file, sr)
+    
+    return sfo.samplerate, sfo.frames, _soundfile_blocks(sfo)
+
+
+def _ffprobe_audio(input_file):
+    """
+    Read the first audio stream's sample rate and the file's duration with ffprobe.
+    
+    Returns:
+        tuple: (sample_rate, duration_seconds); duration is 0.0 when the
+               container does not record one
+    
+    Raises:
+        click.ClickException: if ffprobe is missing or finds no audio stream
+    """
+    command = ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+               '-show_entries', 'stream=sample_rate:format=duration', '-of', 'json', input_file]
+    try:
+        result = subprocess.run(command, capture_output=True)
+    except FileNotFoundError:
+        raise click.ClickException("FFprobe not found; it is required to decode this format")
+    
+    if result.returncode != 0:
+        raise click.ClickException(f"FFprobe failed to read {input_file}: {result.stderr.decode(errors='replace').strip()}")
+    
+    info = json.loads(result.stdout)
+    streams = info.get('streams') or []
+    if not streams:
+        raise click.ClickException(f"No audio stream found in {input_file}")
+    
+    duration = info.get('format', {}).get('duration', 'N/A')
+    duration = float(duration) if duration != 'N/A' else 0.0
+    return int(streams[0]['sample_rate']), duration
+
+
+def _soundfile_blocks(sfo):
+    """
+    Yield mono float32 blocks from an open SoundFile, closing it when done.
+    
+    Samples are read and downmixed into preallocated buffers, so each
+    yielded block is only valid until the next one is requested.
+    """
+    frames = np.empty((STREAM_BLOCK_SIZE, sfo.channels), dtype=np.float32)
+    mono = np.empty(STREAM_BLOCK_SIZE, dtype=np.float32)
+    with sfo:
+        while True:
+            block = sfo.read(out=frames)
+            n_read = len(block)
+            if n_read == 0:
+                return
+            if sfo.channels == 1:
+                yield block[:, 0]
+            else:
+                yield np.mean(block, axis=1, out=mono[:n_read])
+
+
+def _ffmpeg_blocks(input_file, sr):
+    """
+    Yield mono float32 blocks decoded by an ffmpeg subprocess at the file's native sample rate.
+    
+    Blocks are read into one reused writable buffer and are only valid
+    until the next block is requested, like _soundfile_blocks.
+    """
+    # rematrix_maxval=1 makes ffmpeg's stereo downmix a plain channel average
+    command = ['ffmpeg', '-loglevel', 'error', '-i', input_file,
+               '-f', 'f32le', '-ac', '1', '-rematrix_maxval', '1.0', '-ar', str(sr), 'pipe:1']
+    # stderr goes to a temp file rather than a pipe: nothing drains a pipe
+    # while stdout is being read, so a chatty decoder could block on it
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        except FileNotFoundError:
+            raise click.ClickException("FFmpeg not found; it is required to decode this format")
+        
+        buf = np.empty(STREAM_BLOCK_SIZE, dtype=np.float32)
+        try:
+            while True:
+                n_bytes = proc.stdout.readinto(buf)
+                if not n_bytes:
+                    break
+                yield buf[:n_bytes // 4]
+        finally:
+            proc.stdout.close()
+            proc.wait()
+        
+        if proc.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors='replace').strip()
+            raise click.ClickException(f"FFmpeg failed to decode {input_file}: {message}")
+
+
+def _analysis_frames(pending, window):
+    """STFT every complete frame in pending; return the frames and the unconsumed samples."""
+    if len(pending) < N_FFT:
+        return np.empty((1 + N_FFT // 2, 0), dtype=np.complex64), pending
+    
+    n_frames = 1 + (len(pending) - N_FFT) // HOP_LENGTH
+    frames = librosa.util.frame(pending, frame_length=N_FFT, hop_length=HOP_LENGTH)[:, :n_frames]
+    D = scipy.fft.rfft(window[:, None] * frames, axis=0, workers=_FFT_WORKERS).astype(np.complex64, copy=False)
+    return D, pending[n_frames * HOP_LENGTH:]
+
+
+def _vocode(frames, steps, phase_acc, phi_advance):
+    """
+    Phase-vocode synthesis frames at fractional positions into frames.
+    
+    Same interpolation and phase update as librosa.phase_vocoder, with the
+    running phase carried in and out so consecutive calls join seamlessly.
+    
+    Returns:
+        tuple: (complex64 synthesis frames, updated phase accumulator)
+    """
+    idx = steps.astype(np.intp)
+    alpha = np.mod(steps, 1.0)
+    col0 = frames[:, idx]
+    col1 = frames[:, idx + 1]
     
-    # Check if file exists and is readable
-    if not os.path.exists(input_file):
-        raise click.FileError(input_file, hint="File does not exist")
+    mag = (1.0 - alpha) * np.abs(col0) + alpha * np.abs(col1)
     
-    if os.path.getsize(input_file) == 0:
-        raise click.FileError(input_file, hint="File is empty")
+    # Phase advance, wrapped to [-pi, pi)
+    dphase = np.angle(col1) - np.angle(col0) - phi_advance[:, None]
+    dphase -= 2.0 * np.pi * np.round(dphase / (2.0 * np.pi))
+    increments = phi_advance[:, None] + dphase
     
+    # Each frame uses the phase accumulated before it
+    phase = np.cumsum(increments, axis=1)
+    phase -= increments
+    phase += phase_acc[:, None]
+    
+    stretched = (mag * np.exp(1j * phase)).astype(np.complex64)
+    return stretched, phase[:, -1] + increments[:, -1]
+
+
+def _overlap_add(stretched, window, ola_tail, wss_tail):
+    """
+    Overlap-add inverse-FFT frames onto the carried tail, hop by hop.
+    
+    Returns:
+        tuple: (finished signal rows, finished window-sum rows,
+                new signal tail, new window-sum tail), each shaped (n, HOP_LENGTH)
+    """
+    n_overlap = N_FFT // HOP_LENGTH
+    n_frames = stretched.shape[1]
+    frames = window[:, None] * scipy.fft.irfft(stretched, n=N_FFT, axis=0, workers=_FFT_WORKERS)
+    
+    ola = np.zeros((n_frames + n_overlap - 1, HOP_LENGTH), dtype=np.float32)
+    wss = np.zeros_like(ola)
+    ola[:n_overlap - 1] = ola_tail
+    wss[:n_overlap - 1] = wss_tail
+    
+    window_sq = window ** 2
+    for r in range(n_overlap):
+        seg = slice(r * HOP_LENGTH, (r + 1) * HOP_LENGTH)
+        ola[r:r + n_frames] += frames[seg].T
+        wss[r:r + n_frames] += window_sq[seg]
+    
+    return ola[:n_frames], wss[:n_frames], ola[n_frames:], wss[n_frames:]
+
+
+def _normalize_window_sum(ola, wss):
+    """Flatten finished overlap-add rows and divide out the window sum-square, as istft does."""
+    samples = ola.ravel()
+    wss = wss.ravel()
+    nonzero = wss > librosa.util.tiny(wss)
+    samples[nonzero] /= wss[nonzero]
+    return samples
+
+
+def _stretch_blocks(blocks, speed_factor):
+    """
+    Time-stretch a stream of mono blocks with a stateful phase vocoder.
+    
+    Produces the same signal as change_speed_preserve_pitch on the
+    concatenated input (centered STFT, same n_fft and hop), while holding
+    only about one block of analysis frames in memory.
+    
+    Args:
+        blocks: iterable of 1-D float32 sample blocks
+        speed_factor: float, e.g., 0.75 for 75% speed
+    
+    Yields:
+        1-D float32 blocks of time-stretched audio
+    """
+    n_bins = 1 + N_FFT // 2
+    n_overlap = N_FFT // HOP_LENGTH
+    window = signal.get_window('hann', N_FFT, fftbins=True).astype(np.float32)
+    phi_advance = HOP_LENGTH * np.linspace(0, np.pi, n_bins)
+    
+    pending = np.zeros(N_FFT // 2, dtype=np.float32)  # centering pad, like stft(center=True)
+    frames = np.empty((n_bins, 0), dtype=np.complex64)
+    frame_base = 0  # analysis index of frames[:, 0]
+    next_step = 0  # index of the next synthesis frame
+    phase_acc = None
+    ola_tail = np.zeros((n_overlap - 1, HOP_LENGTH), dtype=np.float32)
+    wss_tail = np.zeros_like(ola_tail)
+    to_skip = N_FFT // 2  # centering samples to drop from the output, like istft(center=True)
+    n_in = 0
+    n_out = 0
+    
+    blocks = iter(blocks)
+    while True:
+        block = next(blocks, None)
+        final = block is None
+        
+        if final:
+            pending = np.concatenate([pending, np.zeros(N_FFT // 2, dtype=np.float32)])
+        else:
+            n_in += len(block)
+            pending = np.concatenate([pending, block])
+        
+        D, pending = _analysis_frames(pending, window)
+        frames = np.concatenate([frames, D], axis=1)
+        n_frames = frame_base + frames.shape[1]
+        if phase_acc is None and frames.shape[1]:
+            phase_acc = np.angle(frames[:, 0]).astype(np.float64)
+        
+        if final:
+            # Vocode up to the end, reading zeros past the last analysis frame
+            last_step = int(np.ceil(n_frames / speed_factor))
+            frames = np.pad(frames, [(0, 0), (0, 2)])
+            steps = np.arange(next_step, last_step) * speed_factor
+        else:
+            # Only steps whose two neighbouring analysis frames both exist yet
+            last_step = int(np.ceil(max(n_frames - 1, 0) / speed_factor)) + 1
+            steps = np.arange(next_step, last_step) * speed_factor
+            steps = steps[steps.astype(np.intp) + 1 < n_frames]
+        
+        if len(steps):
+            stretched, phase_acc = _vocode(frames, steps - frame_base, phase_acc, phi_advance)
+            next_step += len(steps)
+        else:
+            stretched = np.empty((n_bins, 0), dtype=np.complex64)
+        
+        ola, wss, ola_tail, wss_tail = _overlap_add(stretched, window, ola_tail, wss_tail)
+        if final:
+            ola = np.concatenate([ola, ola_tail])
+            wss = np.concatenate([wss, wss_tail])
+        samples = _normalize_window_sum(ola, wss)
+        
+        # Drop analysis frames no later synthesis step can reach
+        keep_from = min(int(next_step * speed_factor) - frame_base, frames.shape[1])
+        if not final and keep_from > 0:
+            frames = frames[:, keep_from:]
+            frame_base += keep_from
+        
+        skipped = min(to_skip, len(samples))
+        samples = samples[skipped:]
+        to_skip -= skipped
+        
+        if final:
+            # Trim or zero-pad to the expected stretched length
+            remaining = int(round(n_in / speed_factor)) - n_out
+            samples = samples[:remaining]
+            if len(samples) < remaining:
+                samples = np.concatenate([samples, np.zeros(remaining - len(samples), dtype=np.float32)])
+        
+        if len(samples):
+            n_out += len(samples)
+            yield samples
+        
+        if final:
+            return
+
+
+def _enhance_blocks(blocks, sr, stats):
+    """
+    Stream enhance_guitar_frequencies over blocks, carrying filter state across them.
+    
+    Peak normalization needs the whole signal, so blocks are yielded
+    unnormalized and the running peak is recorded in stats['peak'].
+    """
+    sos = _design_guitar_shelf(sr)
+    zi = np.zeros((sos.shape[0], 2), dtype=np.float64)
+    for block in blocks:
+        # Upstream blocks are single-use buffers, so filter them in place
+        enhanced, peak = _sosfilt(sos, block, zi, out=block)
+        stats['peak'] = max(stats['peak'], peak)
+        yield enhanced
+
+
+def _stereo_blocks(blocks, sr):
+    """Stream mono_to_stereo_effect over blocks, carrying the Haas delay line and filter state."""
+    delay_samples = int(0.015 * sr)  # 15ms delay
+    history = np.zeros(delay_samples, dtype=np.float32)
+    zi = np.zeros((_STEREO_RIGHT_SOS.shape[0], 2), dtype=np.float64)
+    for block in blocks:
+        n_samples = len(block)
+        history = np.concatenate([history, block])
+        
+        stereo = np.empty((n_samples, 2), dtype=np.float32)
+        stereo[:, 1] = history[:n_samples]
+        history = history[n_samples:]
+        
+        yield _finish_stereo(block, stereo, zi)
+
+
+def _write_blocks(blocks, path, sr, channels, subtype='FLOAT'):
+    """Write blocks to a WAV file (32-bit float by default, so nothing clips before normalization)."""
+    with sf.SoundFile(path, 'w', samplerate=sr, channels=channels, subtype=subtype) as out:
+        for block in blocks:
+            out.write(block)
+
+
+def _scaled_blocks(path, gain):
+    """Read a WAV file back block by block, multiplying by gain."""
+    for block in sf.blocks(path, blocksize=STREAM_BLOCK_SIZE, dtype='float32'):
+        if gain != 1.0:
+            block *= gain
+        yield block
+
+
+def _scale_wav_inplace(path, gain):
+    """Multiply a float WAV file's samples by gain, rewriting it block by block."""
+    with sf.SoundFile(path, 'r+') as sfo:
+        buf = np.empty((STREAM_BLOCK_SIZE, sfo.channels), dtype=np.float32)
+        pos = 0
+        while True:
+            sfo.seek(pos)
+            block = sfo.read(out=buf)
+            if not len(block):
+                break
+            block *= gain
+            sfo.seek(pos)
+            sfo.write(block)
+            pos += len(block)
+
+
+def _temp_sibling(path, suffix):
+    """Create an empty, uniquely named file next to path, on the same filesystem so os.replace is atomic."""
+    fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    # mkstemp creates the file owner-only; give it the mode a normal new file
+    # would get, since it becomes the user's output
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temp_path, 0o666 & ~umask)
+    return temp_path
+
+
+def _encode_blocks(blocks, path, sr, channels, format):
+    """
+    Encode blocks to MP3 or OGG by piping raw float32 PCM into ffmpeg's stdin.
+    
+    ffmpeg writes to a temporary file that replaces path only once encoding
+    has succeeded, so a failure never leaves a truncated output behind.
+    
+    Raises:
+        click.ClickException: if ffmpeg is missing or fails to encode
+    """
+    if format == 'mp3':
+        codec_args = ['-c:a', 'libmp3lame', '-b:a', '320k', '-f', 'mp3']
+    else:
+        codec_args = ['-c:a', 'libvorbis', '-f', 'ogg']
+    
+    temp_path = _temp_sibling(path, f'.{format}')
+    command = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'f32le', '-ar', str(sr), '-ac', str(channels), '-i', 'pipe:0',
+               *codec_args, temp_path]
+    # stderr goes to a temp file rather than a pipe: nothing drains a pipe
+    # while stdin is being written, so a chatty encoder could block on it
+    try:
+        with tempfile.TemporaryFile() as stderr:
+            try:
+                proc = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr)
+            except FileNotFoundError:
+                raise click.ClickException("FFmpeg not found; it is required for MP3/OGG export")
+            
+            try:
+                for block in blocks:
+                    # Blocks are already channels-last, i.e. the interleaved layout
+                    # f32le expects; clip to full scale since the lossy encoders expect it
+                    pcm = np.clip(block, -1.0, 1.0, dtype=np.float32)
+                    proc.stdin.write(pcm.tobytes())
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its error is reported below
+            finally:
+                proc.communicate()
+            
+            if proc.returncode != 0:
+                stderr.seek(0)
+                message = stderr.read().decode(errors='replace').strip()
+                raise click.ClickException(f"FFmpeg failed to encode {path}: {message}")
+        
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _init_worker(threads):
+    """Process-pool initializer: limit each worker's Numba and FFT thread pools."""
+    global _FFT_WORKERS
+    _FFT_WORKERS = threads
+    # Numba cannot grow past the pool size it was started with (NUMBA_NUM_THREADS)
+    numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+
+
+def _failure_message(e):
+    """Describe a per-file batch failure; unexpected errors keep their type name."""
+    if isinstance(e, click.ClickException):
+        return e.format_message()
+    return f"{type(e).__name__}: {e}"
+
+
+def _default_output(input_file, speed, format):
+    """Output path used when -o is not given: <input base>_slowed_<pct>pct.<format>."""
+    base, ext = os.path.splitext(input_file)
+    speed_percentage = int(speed * 100)
+    return f"{base}_slowed_{speed_percentage}pct.{format}"
+
+
+def _process_one(input_file, speed, enhance_guitar, stereo, output, format):
+    """
+    Run the full pipeline for one input file and export the result.
+    
+    Raises:
+        click.ClickException: if the file cannot be decoded or encoded
+    """
     click.echo(f"Loading audio file: {input_file}")
     
-    # Load audio with librosa
+    # Open audio for block-wise decoding; each stage below streams over the blocks
     try:
-        audio_data, sr = librosa.load(input_file, sr=None, mono=True)
+        sr, n_samples, blocks = _open_blocks(input_file)
     except Exception as e:
         raise click.ClickException(f"Failed to load audio file: {str(e)}")
     
-    click.echo(f"Sample rate: {sr} Hz, Duration: {len(audio_data)/sr:.2f}s")
+    click.echo(f"Sample rate: {sr} Hz, Duration: {n_samples/sr:.2f}s")
     
     # Apply speed change if needed
     if speed != 1.0:
         click.echo(f"Changing speed to {speed*100:.0f}%...")
-        audio_data = change_speed_preserve_pitch(audio_data, sr, speed)
+        blocks = _stretch_blocks(blocks, speed)
     
     # Apply guitar enhancement if requested
+    stats = {'peak': 0.0}
     if enhance_guitar:
-        click.echo("Enhancing guitar frequencies (80 Hz - 5 kHz)...")
-        audio_data = enhance_guitar_frequencies(audio_data, sr)
+        click.echo("Enhancing guitar frequencies (500 Hz peaking EQ)...")
+        blocks = _enhance_blocks(blocks, sr, stats)
     
     # Apply stereo effect if requested
     if stereo:
         click.echo("Creating stereo effect...")
-        audio_data = mono_to_stereo_effect(audio_data, sr)
-    else:
-        # Ensure proper shape for mono
-        if len(audio_data.shape) == 1:
-            audio_data = audio_data.reshape(1, -1)
+        blocks = _stereo_blocks(blocks, sr)
     
     # Determine output filename
     if output is None:
-        base, ext = os.path.splitext(input_file)
-        speed_percentage = int(speed * 100)
-        output = f"{base}_slowed_{speed_percentage}pct.{format}"
+        output = _default_output(input_file, speed, format)
     
     # Export processed audio
     click.echo(f"Exporting to {output}...")
     
-    # Transpose if needed for soundfile (expects channels last)
-    if len(audio_data.shape) == 2:
-        audio_data = audio_data.T
-    
-    # Write to temporary WAV file
-    temp_wav = output.replace(f'.{format}', '_temp.wav')
-    sf.write(temp_wav, audio_data, sr)
-    
-    # Convert to final format if MP3 or OGG
-    if format.lower() == 'mp3':
-        audio_segment = AudioSegment.from_wav(temp_wav)
-        audio_segment.export(output, format='mp3', bitrate='320k')
-        os.remove(temp_wav)
-    elif format.lower() == 'ogg':
-        audio_segment = AudioSegment.from_wav(temp_wav)
-        audio_segment.export(output, format='ogg', codec='libvorbis')
-        os.remove(temp_wav)
-    else:
-        os.rename(temp_wav, output)
+    channels = 2 if stereo else 1
+    
+    # WAV output is a float WAV, and normalizing to prevent clipping needs the
+    # whole signal's peak: in either case spool the pipeline to a float WAV
+    is_wav = format.lower() == 'wav'
+    spool_wav = None
+    if enhance_guitar or is_wav:
+        # Uniquely named, so it never clobbers a user file or another run's spool
+        spool_wav = _temp_sibling(output, '.wav')
+    
+    try:
+        if spool_wav is None:
+            # Pipe PCM straight into ffmpeg for MP3 or OGG
+            _encode_blocks(blocks, output, sr, channels, format.lower())
+        else:
+            _write_blocks(blocks, spool_wav, sr, channels)
+            gain = 1.0 / stats['peak'] if stats['peak'] > 1.0 else 1.0
+            if is_wav:
+                # Normalize the spool in place and move it over the output
+                if gain != 1.0:
+                    _scale_wav_inplace(spool_wav, gain)
+                os.replace(spool_wav, output)
+            else:
+                # Replay the spool into ffmpeg with the normalization gain
+                _encode_blocks(_scaled_blocks(spool_wav, gain), output, sr,
+                               channels, format.lower())
+    finally:
+        if spool_wav is not None and os.path.exists(spool_wav):
+            os.remove(spool_wav)
     
     click.echo(f"✓ Done! Saved to {output}")
 
 
+@click.command()
+@click.argument('input_files', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--speed', '-s', default=1.0, help='Playback speed factor (e.g., 0.75 for 75% speed)', type=float)
+@click.option('--enhance-guitar', '-g', is_flag=True, help='Enhance guitar frequencies (+3 dB peaking EQ at 500 Hz)')
+@click.option('--stereo', '-st', is_flag=True, help='Convert mono to pseudo-stereo')
+@click.option('--output', '-o', default=None, help='Output file path (default: input_slowed_<pct>pct.<format>)', type=click.Path())
+@click.option('--format', '-f', default='mp3', type=click.Choice(['mp3', 'wav', 'ogg'], case_sensitive=False), help='Output format')
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='Number of files to process in parallel')
+def slowmedown(input_files, speed, enhance_guitar, stereo, output, format, jobs):
+    """
+    Slow down MP3/audio files for guitar practice while preserving pitch.
+    
+    Example: python slowmedown.py song.mp3 --speed 0.75 --enhance-guitar --stereo
+    
+    Several files can be given at once and processed in parallel:
+    python slowmedown.py *.mp3 --speed 0.75 --jobs 4
+    """
+    # Validate speed factor
+    if speed <= 0:
+        raise click.BadParameter("Speed factor must be greater than 0", param_hint="--speed")
+    
+    if output is not None and len(input_files) > 1:
+        raise click.BadParameter("Can only be used with a single input file", param_hint="--output")
+    
+    # The input is decoded while the output is written, so they must differ
+    if output is not None and os.path.exists(output) and os.path.samefile(input_files[0], output):
+        raise click.BadParameter("Must not be the input file", param_hint="--output")
+    
+    # A file listed twice would be processed twice into the same output
+    unique_files = {}
+    for input_file in input_files:
+        unique_files.setdefault(os.path.realpath(input_file), input_file)
+    input_files = list(unique_files.values())
+    
+    # Check if files exist and are readable
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            raise click.FileError(input_file, hint="File does not exist")
+        
+        if os.path.getsize(input_file) == 0:
+            raise click.FileError(input_file, hint="File is empty")
+    
+    # Inputs differing only in extension (x.wav, x.m4a) share a default
+    # output, and one input's default output may be another input file
+    if len(input_files) > 1:
+        claimed = dict(unique_files)
+        for input_file in input_files:
+            output_path = os.path.realpath(_default_output(input_file, speed, format))
+            if output_path in claimed:
+                raise click.BadParameter(
+                    f"{input_file} would be written to {output_path}, which is also used by {claimed[output_path]}",
+                    param_hint="INPUT_FILES")
+            claimed[output_path] = input_file
+    
+    if len(input_files) == 1:
+        _process_one(input_files[0], speed, enhance_guitar, stereo, output, format)
+        return
+    
+    # Batch mode: files are independent, so any failure is reported per file
+    failures = 0
+    if jobs == 1:
+        for input_file in input_files:
+            try:
+                _process_one(input_file, speed, enhance_guitar, stereo, None, format)
+            except Exception as e:
+                failures += 1
+                click.echo(f"✗ {input_file}: {_failure_message(e)}", err=True)
+    else:
+        workers = min(jobs, len(input_files))
+        # Split the cores between workers so their parallel kernels don't oversubscribe
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = {
+                pool.submit(_process_one, input_file, speed, enhance_guitar, stereo, None, format): input_file
+                for input_file in input_files
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures += 1
+                    click.echo(f"✗ {futures[future]}: {_failure_message(e)}", err=True)
+    
+    if failures:
+        raise click.ClickException(f"{failures} of {len(input_files)} files failed")
+
+
 if __name__ == '__main__':
     slowmedown()
@@ -1,4 +1,5 @@
 import sys
+import functools
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -7,7 +8,15 @@ import pytest
 import numpy as np
 
 
-@pytest.fixture
+@functools.lru_cache(maxsize=16)
+def _t(sr, duration):
+    """Time vector shared by every sine of a given length; read-only so the cache stays valid."""
+    t = np.linspace(0, duration, int(sr * duration), endpoint=False, dtype=np.float32)
+    t.flags.writeable = False
+    return t
+
+
+@pytest.fixture(scope='session')
 def generate_sine_wave():
     """Factory fixture to generate pure sine waves for testing."""
     def _generate(frequency, duration, sr=22050):
@@ -19,10 +28,12 @@ def generate_sine_wave():
             sr: Sample rate (default 22050)
             
         Returns:
-            tuple: (audio_data, sample_rate)
+            tuple: (audio_data, sample_rate), audio_data as float32
         """
-        t = np.linspace(0, duration, int(sr * duration), endpoint=False)
-        audio_data = np.sin(2 * np.pi * frequency * t)
+        t = _t(sr, duration)
+        audio_data = np.empty_like(t)
+        np.multiply(t, 2 * np.pi * frequency, out=audio_data)
+        np.sin(audio_data, out=audio_data)
         return audio_data, sr
     return _generate
 
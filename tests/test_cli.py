@@ -1,10 +1,13 @@
 import pytest
 import os
+import shutil
 import tempfile
 import numpy as np
 import soundfile as sf
 import librosa
+import numba
 from click.testing import CliRunner
+import slowmedown as slowmedown_module
 from slowmedown import slowmedown
 
 
@@ -14,11 +17,10 @@ def cli_runner():
     return CliRunner()
 
 
-@pytest.fixture
-def temp_audio_file(generate_sine_wave):
-    """Create a temporary MP3 file for testing."""
-    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
-        temp_path = f.name
+@pytest.fixture(scope='session')
+def temp_audio_file(tmp_path_factory, generate_sine_wave):
+    """Create a temporary MP3 file once, shared read-only by every test."""
+    temp_path = str(tmp_path_factory.mktemp('audio') / 'input.mp3')
     
     audio_data, sr = generate_sine_wave(440, 1.0, 22050)
     
@@ -36,21 +38,29 @@ def temp_audio_file(generate_sine_wave):
         os.remove(temp_path)
 
 
+@pytest.fixture
+def isolated_input(tmp_path, temp_audio_file):
+    """Copy the shared MP3 into a per-test directory, for tests that write outputs beside it."""
+    dst = tmp_path / 'in.mp3'
+    shutil.copy(temp_audio_file, dst)
+    return str(dst)
+
+
 class TestCLIBasic:
     """Basic CLI integration tests."""
     
-    def test_basic_slowdown(self, cli_runner, temp_audio_file):
+    def test_basic_slowdown(self, cli_runner, isolated_input):
         """Test basic slowdown with --speed 0.75."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.mp3')
         
         try:
-            result = cli_runner.invoke(slowmedown, [temp_audio_file, '--speed', '0.75'])
+            result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.75'])
             
             assert result.exit_code == 0
             assert os.path.exists(output_path)
             assert os.path.getsize(output_path) > 0
             
-            input_duration = librosa.get_duration(path=temp_audio_file)
+            input_duration = librosa.get_duration(path=isolated_input)
             output_duration = librosa.get_duration(path=output_path)
             
             expected_duration = input_duration / 0.75
@@ -59,13 +69,13 @@ class TestCLIBasic:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_all_options_combined(self, cli_runner, temp_audio_file):
+    def test_all_options_combined(self, cli_runner, isolated_input):
         """Test all options: speed, guitar enhancement, stereo."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_50pct.mp3')
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--speed', '0.5',
                 '--enhance-guitar',
                 '--stereo'
@@ -96,17 +106,138 @@ class TestCLIBasic:
             assert result.exit_code == 0
             assert os.path.exists(output_path)
 
+    def test_batch_multiple_files(self, cli_runner, temp_audio_file):
+        """Test several inputs processed in parallel with --jobs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            inputs = []
+            for name in ('first.mp3', 'second.mp3'):
+                path = os.path.join(tmpdir, name)
+                shutil.copy(temp_audio_file, path)
+                inputs.append(path)
+            
+            result = cli_runner.invoke(slowmedown, [*inputs, '--speed', '0.75', '--jobs', '2'])
+            
+            assert result.exit_code == 0
+            for path in inputs:
+                assert os.path.exists(path.replace('.mp3', '_slowed_75pct.mp3'))
+    
+    def test_batch_counts_unexpected_errors_per_file(self, cli_runner, temp_audio_file, monkeypatch):
+        """Test that a non-Click error in one file is reported and the rest of the batch still runs."""
+        process_one = slowmedown_module._process_one
+        
+        def flaky_process_one(input_file, *args):
+            if os.path.basename(input_file) == 'first.mp3':
+                raise RuntimeError("worker blew up")
+            return process_one(input_file, *args)
+        
+        monkeypatch.setattr(slowmedown_module, '_process_one', flaky_process_one)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            inputs = []
+            for name in ('first.mp3', 'second.mp3'):
+                path = os.path.join(tmpdir, name)
+                shutil.copy(temp_audio_file, path)
+                inputs.append(path)
+            
+            result = cli_runner.invoke(slowmedown, [*inputs, '--speed', '0.75'])
+            
+            assert result.exit_code != 0
+            assert "RuntimeError: worker blew up" in result.output
+            assert "1 of 2 files failed" in result.output
+            assert os.path.exists(inputs[1].replace('.mp3', '_slowed_75pct.mp3'))
+    
+    def test_init_worker_clamps_numba_threads(self, monkeypatch):
+        """Test that a per-worker thread share above NUMBA_NUM_THREADS is clamped rather than raising."""
+        monkeypatch.setattr(slowmedown_module, '_FFT_WORKERS', slowmedown_module._FFT_WORKERS)
+        original = numba.get_num_threads()
+        try:
+            slowmedown_module._init_worker(numba.config.NUMBA_NUM_THREADS + 1)
+            assert numba.get_num_threads() == numba.config.NUMBA_NUM_THREADS
+        finally:
+            numba.set_num_threads(original)
+    
+    def test_batch_deduplicates_inputs(self, cli_runner, isolated_input):
+        """Test that a file listed twice is processed once."""
+        result = cli_runner.invoke(slowmedown, [isolated_input, isolated_input, '--speed', '0.75', '--jobs', '2'])
+        
+        assert result.exit_code == 0
+        assert result.output.count("✓ Done!") == 1
+        assert sorted(os.listdir(os.path.dirname(isolated_input))) == ['in.mp3', 'in_slowed_75pct.mp3']
+    
+    def test_batch_rejects_colliding_outputs(self, cli_runner, isolated_input, generate_sine_wave):
+        """Test that inputs differing only in extension are rejected instead of overwriting each other."""
+        wav_input = isolated_input.replace('.mp3', '.wav')
+        audio_data, sr = generate_sine_wave(440, 1.0, 22050)
+        sf.write(wav_input, audio_data, sr)
+        
+        result = cli_runner.invoke(slowmedown, [wav_input, isolated_input, '--speed', '0.5', '--jobs', '2'])
+        
+        assert result.exit_code != 0
+        assert "in_slowed_50pct.mp3" in result.output
+        assert sorted(os.listdir(os.path.dirname(isolated_input))) == ['in.mp3', 'in.wav']
+    
+    def test_batch_rejects_output_over_another_input(self, cli_runner, isolated_input):
+        """Test that one input's default output may not be another input file."""
+        other_input = isolated_input.replace('.mp3', '_slowed_75pct.mp3')
+        shutil.copy(isolated_input, other_input)
+        
+        result = cli_runner.invoke(slowmedown, [isolated_input, other_input, '--speed', '0.75'])
+        
+        assert result.exit_code != 0
+        assert sorted(os.listdir(os.path.dirname(isolated_input))) == ['in.mp3', 'in_slowed_75pct.mp3']
+    
+    def test_spool_leaves_neighbouring_files_alone(self, cli_runner, isolated_input):
+        """Test that the temporary spool never overwrites or deletes a user file next to the output."""
+        user_file = isolated_input.replace('.mp3', '_slowed_75pct_spool.wav')
+        with open(user_file, 'wb') as f:
+            f.write(b'user data')
+        
+        result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.75', '-g', '-f', 'wav'])
+        
+        assert result.exit_code == 0
+        with open(user_file, 'rb') as f:
+            assert f.read() == b'user data'
+        assert sorted(os.listdir(os.path.dirname(isolated_input))) == [
+            'in.mp3', 'in_slowed_75pct.wav', 'in_slowed_75pct_spool.wav']
+    
+    def test_batch_rejects_single_output(self, cli_runner, temp_audio_file):
+        """Test that -o cannot be combined with several inputs."""
+        result = cli_runner.invoke(slowmedown, [temp_audio_file, temp_audio_file, '-o', 'out.mp3'])
+        assert result.exit_code != 0
+    
+    def test_output_same_as_input_rejected(self, cli_runner, isolated_input):
+        """Test that -o pointing at the input file fails without touching it."""
+        with open(isolated_input, 'rb') as f:
+            original = f.read()
+        
+        result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.75', '-o', isolated_input])
+        
+        assert result.exit_code != 0
+        with open(isolated_input, 'rb') as f:
+            assert f.read() == original
+        assert os.listdir(os.path.dirname(isolated_input)) == ['in.mp3']
+    
+    def test_output_has_default_permissions(self, cli_runner, isolated_input):
+        """Test that outputs moved into place from a temp file get the usual umask-derived mode."""
+        umask = os.umask(0)
+        os.umask(umask)
+        for format in ('mp3', 'wav'):
+            result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.75', '-f', format])
+            
+            assert result.exit_code == 0
+            output_path = isolated_input.replace('.mp3', f'_slowed_75pct.{format}')
+            assert os.stat(output_path).st_mode & 0o777 == 0o666 & ~umask
+
 
 class TestCLIFormats:
     """Test different output formats."""
     
-    def test_mp3_output(self, cli_runner, temp_audio_file):
+    def test_mp3_output(self, cli_runner, isolated_input):
         """Test MP3 output format."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.mp3')
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--speed', '0.75',
                 '--format', 'mp3'
             ])
@@ -118,13 +249,13 @@ class TestCLIFormats:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_wav_output(self, cli_runner, temp_audio_file):
+    def test_wav_output(self, cli_runner, isolated_input):
         """Test WAV output format."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.wav')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.wav')
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--speed', '0.75',
                 '--format', 'wav'
             ])
@@ -136,13 +267,13 @@ class TestCLIFormats:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_ogg_output(self, cli_runner, temp_audio_file):
+    def test_ogg_output(self, cli_runner, isolated_input):
         """Test OGG output format."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.ogg')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.ogg')
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--speed', '0.75',
                 '--format', 'ogg'
             ])
@@ -158,20 +289,20 @@ class TestCLIFormats:
 class TestCLIEndToEnd:
     """End-to-end verification tests."""
     
-    def test_duration_accuracy(self, cli_runner, temp_audio_file):
+    def test_duration_accuracy(self, cli_runner, isolated_input):
         """Test that output duration matches expected ratio."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.mp3')
         speed_factor = 0.75
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--speed', str(speed_factor)
             ])
             
             assert result.exit_code == 0
             
-            input_duration = librosa.get_duration(path=temp_audio_file)
+            input_duration = librosa.get_duration(path=isolated_input)
             output_duration = librosa.get_duration(path=output_path)
             
             expected_ratio = 1 / speed_factor
@@ -182,13 +313,13 @@ class TestCLIEndToEnd:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_stereo_channel_count(self, cli_runner, temp_audio_file):
+    def test_stereo_channel_count(self, cli_runner, isolated_input):
         """Test that stereo flag produces 2 channels."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_100pct.mp3')
         
         try:
             result = cli_runner.invoke(slowmedown, [
-                temp_audio_file,
+                isolated_input,
                 '--stereo'
             ])
             
@@ -202,12 +333,12 @@ class TestCLIEndToEnd:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_file_loadable(self, cli_runner, temp_audio_file):
+    def test_file_loadable(self, cli_runner, isolated_input):
         """Test that output file can be loaded with librosa."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_75pct.mp3')
         
         try:
-            result = cli_runner.invoke(slowmedown, [temp_audio_file, '--speed', '0.75'])
+            result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.75'])
             
             assert result.exit_code == 0
             
@@ -264,24 +395,24 @@ class TestCLIEdgeCases:
         result = cli_runner.invoke(slowmedown, [temp_audio_file, '--speed', '-0.5'])
         assert result.exit_code != 0
     
-    def test_extreme_speed_very_slow(self, cli_runner, temp_audio_file):
+    def test_extreme_speed_very_slow(self, cli_runner, isolated_input):
         """Test extreme speed factor (very slow)."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_10pct.mp3')
         
         try:
-            result = cli_runner.invoke(slowmedown, [temp_audio_file, '--speed', '0.1'])
+            result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '0.1'])
             assert result.exit_code == 0
             assert os.path.exists(output_path)
         finally:
             if os.path.exists(output_path):
                 os.remove(output_path)
     
-    def test_extreme_speed_very_fast(self, cli_runner, temp_audio_file):
+    def test_extreme_speed_very_fast(self, cli_runner, isolated_input):
         """Test extreme speed factor (very fast)."""
-        output_path = temp_audio_file.replace('.mp3', '_slowed.mp3')
+        output_path = isolated_input.replace('.mp3', '_slowed_1000pct.mp3')
         
         try:
-            result = cli_runner.invoke(slowmedown, [temp_audio_file, '--speed', '10.0'])
+            result = cli_runner.invoke(slowmedown, [isolated_input, '--speed', '10.0'])
             assert result.exit_code == 0
             assert os.path.exists(output_path)
         finally:
@@ -303,7 +434,7 @@ class TestCLIEdgeCases:
         audio_segment.export(temp_path, format='mp3')
         os.remove(wav_temp)
         
-        output_path = temp_path.replace('.mp3', '_slowed.mp3')
+        output_path = temp_path.replace('.mp3', '_slowed_75pct.mp3')
         
         try:
             result = cli_runner.invoke(slowmedown, [temp_path, '--speed', '0.75'])
@@ -330,7 +461,7 @@ class TestCLIEdgeCases:
         audio_segment.export(temp_path, format='mp3')
         os.remove(wav_temp)
         
-        output_path = temp_path.replace('.mp3', '_slowed.mp3')
+        output_path = temp_path.replace('.mp3', '_slowed_75pct.mp3')
         
         try:
             result = cli_runner.invoke(slowmedown, [temp_path, '--speed', '0.75'])